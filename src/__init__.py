@@ -1,76 +1,146 @@
-from __future__  import annotations
-from copy        import deepcopy
-from datetime    import date
-from math        import ceil
-from os.path       import exists
-from src.classes   import *
-from src.utilities import *
-from time          import time
-from typing        import Any, Optional
+from __future__         import annotations
+from argparse           import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime           import date
+from itertools          import zip_longest
+from operator           import attrgetter
+from os                 import cpu_count
+from os.path            import exists
+from src.classes        import Course, CourseType, Data, GradeLevel, Student
+from src.utilities      import (
+  encode,
+  find_filepath,
+  find_filepaths,
+  get_target_scores,
+  jsonl_to_xlsx,
+  meets_target_scores,
+  score,
+  seconds_since,
+  solve,
+  to_jsonl,
+  to_record,
+  to_xlsx,
+  total_score)
+from time               import perf_counter_ns
+from typing             import Any, Final, Optional
+from xlsxwriter         import Workbook
 
-import sys
+import random
 
-def export(
-  data: Data, 
+RESULT_FILEPATH : Final = 'output'
+RESULT_FILENAME : Final = f'{date.today()} Result {"{}"}.xlsx'
+RECORDS_FILENAME: Final = f'{date.today()} Results {"{}"}.jsonl'
+
+DEBUG: Final = True
+
+SORT_KEY = attrgetter('sort_key')
+
+def summary_rows(
+  data: Data,
   time_taken: int,
   number_of_guesses: int,
   targets: Optional[dict[CourseType, float]] = None):
-  filename = find_filepath(RESULT_FILEPATH, RESULT_FILENAME)
-  sheet: list[list[Any]] = [
-    ['Time taken (s):', time_taken],
-    ['Number of guesses:', number_of_guesses]]
+  yield ['Time taken (s):', time_taken]
+  yield ['Number of guesses:', number_of_guesses]
   if targets:
-    sheet.append(['Course Type', 'Target (%)', 'Score (%)'])
-    sheet += list(
-      [course_type, targets[course_type], actual_score]
-      for course_type, actual_score in score(data).items())
+    yield ['Course Type', 'Target (%)', 'Score (%)']
+    for course_type, actual_score in score(data).items():
+      yield [course_type, targets[course_type], actual_score]
   else:
-    sheet.append(['Course Type', 'Score (%)'])
-    sheet += list(
-      [course_type, actual_score]
-      for course_type, actual_score in score(data).items())
-  to_xlsx(filename, 'Summary', sheet)
+    yield ['Course Type', 'Score (%)']
+    for course_type, actual_score in score(data).items():
+      yield [course_type, actual_score]
+
+def grade_level_rows(
+  grade_level : GradeLevel,
+  students    : list[Student],
+  course_types: list[CourseType]):
+  ranked_types = sorted(
+    course_type for course_type, ranked in grade_level.courses if ranked)
+  yield ['Student'] + course_types + list(
+    f'Remarks: {course_type}' for course_type in ranked_types)
+  for student in sorted(students, key=SORT_KEY):
+    line: list[Any] = [student] + list(
+      student.sections[student.takes[course_type]] 
+      if course_type in student.takes else ''
+      for course_type in course_types )
+    reason_rejected = student.rankings.final.reason_rejected
+    for course_type in ranked_types:
+      initial = student.rankings.initial(course_type)
+      if initial is None:
+        line.append('Initial rankings were invalid')
+        continue
+      takes = student.takes.get(course_type)
+      if takes is None:
+        line.append(f'Wants {initial}')
+      elif takes == initial:
+        line.append('')
+      else:
+        line.append(f'{initial}: {reason_rejected[course_type][initial]}')
+    yield line
+
+def course_rows(course: Course):
+  columns = list(
+    [section] + sorted(section.students, key=SORT_KEY)
+    for section in sorted(course.sections, key=SORT_KEY))
+  return zip_longest(*columns, fillvalue='')
+
+def sheets(
+  data: Data, 
+  time_taken: int,
+  number_of_guesses: int,
+  targets: Optional[dict[CourseType, float]] = None):
+  yield 'Summary', summary_rows(data, time_taken, number_of_guesses, targets)
+  course_types = sorted(data.course_types.values())
   for grade_level, students in data.students.items():
-    course_types = sorted(data.course_types.values())
-    ranked_types = sorted(
-      course_type for course_type, ranked in grade_level.courses if ranked)
-    sheet = [['Student'] + course_types + list(
-      map(lambda course_type: f'Remarks: {course_type}', ranked_types))]
-    for student in sorted(students):
-      line: list[Any] = [student] + list(
-        student.sections[student.takes[course_type]] 
-        if course_type in student.takes else ''
-        for course_type in course_types )
-      for course_type in ranked_types:
-        if student.rankings.initial(course_type):
-          if course_type in student.takes:
-            line.append(
-              '{}: {}'.format(
-                student.rankings.initial(course_type),
-                student.rankings.final.reason_rejected[course_type][
-                  student.rankings.initial(course_type)
-                ])  # type: ignore
-              if student.takes[course_type] != student.rankings.initial(
-                course_type) else '')
-          else:
-            line.append(f'Wants {student.rankings.initial(course_type)}')
-        else:
-          line.append('Initial rankings were invalid')
-      sheet.append(line)
-    to_xlsx(filename, str(grade_level), sheet)
-  for course in data.courses.values():
+    yield str(grade_level), grade_level_rows(
+      grade_level, students, course_types)
+  for name, course in data.courses.items():
     if course.sections:
-      sheet = list(list() for _ in range(max(map(
-        lambda section: len(section.students), course.sections)) + 1))
-      for section in sorted(course.sections):
-        sheet[0].append(section)
-        for i, student in enumerate(sorted(section.students), 1):
-          sheet[i].append(student)
-        for j in range(i + 1, len(sheet)):  # type: ignore
-          sheet[j].append('')
-      to_xlsx(filename, str(course), sheet)
+      yield name, course_rows(course)
+
+def export(
+  data: Data, 
+  filepath: str,
+  time_taken: int,
+  number_of_guesses: int,
+  targets: Optional[dict[CourseType, float]] = None):
+  workbook = Workbook(filepath, {'constant_memory': True})
+  for sheet, rows in sheets(data, time_taken, number_of_guesses, targets):
+    to_xlsx(workbook, sheet, rows)
+  workbook.close()
+  
+def produce_result(
+  data: Data,
+  filepath: Optional[str],
+  targets: dict[CourseType, float],
+  seed: int):
+  random.seed(seed)
+  initial_time = perf_counter_ns()
+  number_of_guesses = 0
+  while not meets_target_scores(data, targets):
+    number_of_guesses += 1
+    solve(data)
+  time_taken = seconds_since(initial_time)
+  if filepath:
+    export(data, filepath, time_taken, number_of_guesses, targets)
+    return None
+  return to_record(sheets(data, time_taken, number_of_guesses, targets))
+    
+def best_result(data: Data, guess_count: int, seed: int):
+  random.seed(seed)
+  best = data.snapshot()
+  best_total = total_score(data)
+  for _ in range(guess_count):
+    solve(data)
+    data_total = total_score(data, True)
+    if best_total < data_total:
+      best = data.snapshot()
+      best_total = data_total
+  data.restore(best)
+  return best_total, data
     
-def main():
+def main(result_format: str = 'xlsx'):
   system_path   = 'input/Test Data_ Subjects.xlsx'
   students_path = 'input/Test Data_ Students.xlsx'
   if not DEBUG:
@@ -91,38 +161,64 @@ def main():
     case 1:
       target_scores = dict(get_target_scores(data))
       results_count = int(input('Number of results to produce: '))
-      for _ in range(results_count):
-        initial_time = time()
-        number_of_guesses = 0
-        while not meets_target_scores(data, target_scores):
-          number_of_guesses += 1
-          solve(data)
-        time_taken = ceil(time() - initial_time)
-        export(data, time_taken, number_of_guesses, target_scores)
+      filepaths = list[Optional[str]]([None] * results_count)
+      if result_format == 'xlsx':
+        filepaths = list(find_filepaths(
+          RESULT_FILEPATH, RESULT_FILENAME, results_count))
+      with ProcessPoolExecutor() as executor:
+        results = list(
+          executor.submit(
+            produce_result,
+            data,
+            filepath,
+            target_scores,
+            random.getrandbits(64))
+          for filepath in filepaths)
+        records = list(result.result() for result in results)
+      if result_format == 'json':
+        to_jsonl(find_filepath(RESULT_FILEPATH, RECORDS_FILENAME), records)
     case 2:
-      initial_time = time()
-      best = deepcopy(data)
       guess_count = int(input('Number of iterations to choose from: '))
-      for _ in range(guess_count):
-        solve(data)
-        if sum(score(best).values()) < sum(score(data, True).values()):
-          best = deepcopy(data)
-      time_taken = ceil(time() - initial_time)
-      export(best, time_taken, guess_count)
+      initial_time = perf_counter_ns()
+      workers = min(guess_count, cpu_count() or 1) or 1
+      with ProcessPoolExecutor(workers) as executor:
+        results = list(
+          executor.submit(
+            best_result,
+            data,
+            guess_count // workers + (worker < guess_count % workers),
+            random.getrandbits(64))
+          for worker in range(workers))
+        _, data = max(
+          (result.result() for result in results), key=lambda x: x[0])
+      time_taken = seconds_since(initial_time)
+      if result_format == 'json':
+        to_jsonl(
+          find_filepath(RESULT_FILEPATH, RECORDS_FILENAME),
+          [to_record(sheets(data, time_taken, guess_count))])
+      else:
+        export(
+          data,
+          find_filepath(RESULT_FILEPATH, RESULT_FILENAME),
+          time_taken,
+          guess_count)
     case _:
       raise Exception('Mode not supported')
 
 if __name__ == '__main__':
-  sys.setrecursionlimit(int(1e9))
-  
-  RESULT_FILEPATH = 'output'
-  RESULT_FILENAME = f'{date.today()} Result {"{}"}.xlsx'
+  parser = ArgumentParser()
+  parser.add_argument(
+    '--format',
+    choices=['xlsx', 'json'],
+    default='xlsx',
+    help='write results as xlsx workbooks or as lines of one jsonl file')
+  parser.add_argument(
+    '--convert',
+    metavar='JSONL',
+    help='convert the results in a jsonl file to xlsx workbooks and exit')
+  arguments = parser.parse_args()
   
-  RESEARCH = 'Research'
-  MATH = 'Mathematics level'
-  CORE = 'Core science elective'
-  ELEC = 'Science and technology elective'
-  
-  DEBUG = True
-  
-  main()
\ No newline at end of file
+  if arguments.convert:
+    jsonl_to_xlsx(arguments.convert, RESULT_FILEPATH, RESULT_FILENAME)
+  else:
+    main(arguments.format)
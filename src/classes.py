@@ -1,6 +1,8 @@
 from __future__  import annotations
-from collections import defaultdict
-from typing     import Iterable, Optional, Union
+from bisect      import insort
+from collections import Counter, defaultdict
+from operator    import attrgetter
+from typing      import Iterable, Optional, Union
 
 import random
 
@@ -8,12 +10,33 @@ RESEARCH = 'Research'
 MATH = 'Mathematics level'
 CORE = 'Core science elective'
 ELEC = 'Science and technology elective'
+
+LOAD = attrgetter('load')
+
+def first_per_session(sections: Iterable[Section]):
+  firsts = dict[int, Section]()
+  for section in sections:
+    if section.parallel_session.bit not in firsts:
+      firsts[section.parallel_session.bit] = section
+  return list(firsts.values())
+
+class SolverFailure(Exception):
+  pass
   
 class Session:
+  __slots__ = (
+    'alias',
+    'bit')
+  
   alias: str
+  bit  : int
+  
+  __count = 0
   
   def __init__(self, alias: str):
     self.alias = alias
+    self.bit   = 1 << Session.__count
+    Session.__count += 1
     
   def __repr__(self):
     return self.alias
@@ -22,22 +45,33 @@ class Session:
     return self.alias < other.alias
 
 class Shift:
+  __slots__ = (
+    'sessions',
+    'sort_key')
+  
   sessions: list[Session]
+  sort_key: str
   
   def __init__(self):
     self.sessions = list()
+    self.sort_key = ''
     
   def __repr__(self):
-    return ''.join(map(str, self.sessions))
+    return self.sort_key
   
   def __lt__(self, other: Shift):
-    return str(self) < str(other)
+    return self.sort_key < other.sort_key
   
   def add(self, session: Session):
-    self.sessions.append(session)
-    self.sessions.sort()
+    insort(self.sessions, session)
+    self.sort_key = ''.join(map(str, self.sessions))
     
 class Capacity:
+  __slots__ = (
+    'minimum',
+    'ideal',
+    'maximum')
+  
   minimum: int
   ideal  : int
   maximum: int
@@ -48,6 +82,10 @@ class Capacity:
     self.maximum = maximum
     
 class CourseType:
+  __slots__ = (
+    'alias',
+    'order')
+  
   alias: str
   order: int
   
@@ -62,53 +100,79 @@ class CourseType:
     return self.order < other.order
   
 class ParallelSession:
-  shift  : Shift
-  session: Optional[Session]
-  index  : Optional[int]
+  __slots__ = (
+    'shift',
+    'session',
+    'index',
+    'bit',
+    'sort_key')
+  
+  shift   : Shift
+  session : Optional[Session]
+  index   : Optional[int]
+  bit     : int
+  sort_key: str
   
   def __init__(
     self,
     shift  : Shift,
     session: Optional[Session] = None,
     index  : Optional[int]     = None):
-    self.shift   = shift
-    self.session = session
-    self.index   = index
+    self.shift    = shift
+    self.session  = session
+    self.index    = index
+    self.bit      = session.bit if session else 0
+    self.sort_key = f'{session or shift}{index or ""}'
     
   def __repr__(self):
-    return f'{self.session or self.shift}{self.index or ""}'
+    return self.sort_key
   
   def __contains__(self, value: Union[Session, Shift]):
-    return value in {self.session, self.shift}
+    return value is self.session or value is self.shift
   
 class GradeLevel:
-  alias  : int
-  courses: dict[tuple[CourseType, bool], set[Course]]
+  __slots__ = (
+    'alias',
+    'sort_key',
+    'courses',
+    'course_lists')
+  
+  alias       : int
+  sort_key    : str
+  courses     : dict[tuple[CourseType, bool], frozenset[Course]]
+  course_lists: dict[tuple[CourseType, bool], list[Course]]
   
   def __init__(self, alias: int):
-    self.alias   = alias
-    self.courses = defaultdict(set)
+    self.alias        = alias
+    self.sort_key     = f'Grade {alias}'
+    self.courses      = defaultdict(frozenset)
+    self.course_lists = defaultdict(list)
     
   def __repr__(self):
-    return f'Grade {self.alias}'
+    return self.sort_key
   
   def __lt__(self, other: GradeLevel):
-    return str(self) < str(other)
+    return self.sort_key < other.sort_key
   
   def add(self, course_type: CourseType, ranked: bool, course: Course):
-    self.courses[(course_type, ranked)].add(course)
+    key = (course_type, ranked)
+    if course not in self.courses[key]:
+      self.courses[key] = self.courses[key].union({course})
+      self.course_lists[key].append(course)
     
 class Ranking:
+  __slots__ = (
+    'ordered_courses',
+    'reason_rejected')
+  
   ordered_courses: dict[CourseType, list[Course]]
   reason_rejected: dict[CourseType, dict[Course, str]]
   
   def __init__(self, grade_level: GradeLevel):
-    self.ordered_courses = dict(
-      (course_type, list())
-      for course_type, ranked in grade_level.courses if ranked)
-    self.reason_rejected = dict(
-      (course_type, dict())
-      for course_type, ranked in grade_level.courses if ranked)
+    course_types = list(
+      course_type for course_type, ranked in grade_level.courses if ranked)
+    self.ordered_courses = {course_type: [] for course_type in course_types}
+    self.reason_rejected = {course_type: {} for course_type in course_types}
     
   def len(self, course_type: CourseType):
     return len(self.ordered_courses[course_type])
@@ -120,7 +184,21 @@ class Ranking:
     course = self.ordered_courses[course_type].pop(index)
     self.reason_rejected[course_type][course] = reason
     
+  def pop_leading(
+    self, course_type: CourseType, reason: str, courses: frozenset[Course]):
+    ordered_courses = self.ordered_courses[course_type]
+    count = 0
+    while count < len(ordered_courses) and ordered_courses[count] in courses:
+      self.reason_rejected[course_type][ordered_courses[count]] = reason
+      count += 1
+    del ordered_courses[:count]
+    
 class Rankings:
+  __slots__ = (
+    'owner',
+    'start',
+    'final')
+  
   owner: Student
   start: Ranking
   final: Ranking
@@ -141,12 +219,13 @@ class Rankings:
     return self.start.ordered_courses[course_type][index or 0]
   
   def current(self, course_type: CourseType, index: Optional[int] = None):
-    if not self.final.len(course_type):
+    courses = self.final.ordered_courses[course_type]
+    if not courses:
       for course in self.owner.grade_level.courses[(course_type, True)]:
         if course.qualified(self.owner):
-          self.final.add(course_type, course)
-      self.final.ordered_courses[course_type].sort()
-    return self.final.ordered_courses[course_type][index or 0]
+          courses.append(course)
+      courses.sort()
+    return courses[index or 0]
   
   def reset(self):
     for course_type in self.start.ordered_courses:
@@ -154,22 +233,31 @@ class Rankings:
         self.start.ordered_courses[course_type])
   
 class ResearchGroup:
+  __slots__ = (
+    'course',
+    'alias',
+    'sort_key',
+    'students',
+    '__shift')
+  
   course  : Course
   alias   : str
+  sort_key: str
   students: set[Student]
   __shift : Optional[Shift]
   
   def __init__(self, course: Course, alias: str):
     self.alias    = alias
     self.course   = course
+    self.sort_key = f'{course} {alias}'
     self.students = set()
     self.__shift  = None
     
   def __repr__(self):
-    return f'{self.course} {self.alias}'
+    return self.sort_key
   
   def __lt__(self, other: ResearchGroup):
-    return str(self) < str(other)
+    return self.sort_key < other.sort_key
   
   @property
   def shift(self):
@@ -177,46 +265,75 @@ class ResearchGroup:
   
   @shift.setter
   def shift(self, value: Optional[Shift]):
+    if self.__shift is value:
+      return
     self.__shift = value
     for student in self.students:
-      if student.shift != value:
-        student.shift = value
+      student.shift = value
         
   def add(self, student: Student):
     student.research_group = self
     self.students.add(student)
     
 class Student:
+  __slots__ = (
+    'grade_level',
+    'alias',
+    'sort_key',
+    '__shift',
+    'rankings',
+    'taken',
+    'takes',
+    'taken_mask',
+    'takes_mask',
+    'qualified_cache',
+    'research_group',
+    'sessions',
+    'sections',
+    '__available')
+  
   grade_level: GradeLevel
   alias      : str
+  sort_key   : str
   __shift    : Optional[Shift]
   
   rankings: Rankings
   taken   : set[Course]
   takes   : dict[CourseType, Course]
   
+  taken_mask     : int
+  takes_mask     : int
+  qualified_cache: dict[Course, bool]
+  
   research_group: Optional[ResearchGroup]
   sessions      : set[Session]
   sections      : dict[Course, Section]
+  __available   : Optional[tuple[list[Session], set[Session], int]]
   
   def __init__(self, alias: str, grade_level: GradeLevel):
     self.alias       = alias
     self.grade_level = grade_level
+    self.sort_key    = f'{grade_level}-{alias}'
     self.__shift     = None
     
     self.rankings = Rankings(self)
     self.taken    = set()
     self.takes    = dict()
     
+    self.taken_mask      = 0
+    self.takes_mask      = 0
+    self.qualified_cache = dict()
+    
     self.research_group = None
     self.sessions       = set()
     self.sections       = dict()
+    self.__available    = None
     
   def __repr__(self):
-    return f'{self.grade_level}-{self.alias}'
+    return self.sort_key
   
   def __lt__(self, other: Student):
-    return str(self) < str(other)
+    return self.sort_key < other.sort_key
   
   @property
   def shift(self):
@@ -224,17 +341,64 @@ class Student:
   
   @shift.setter
   def shift(self, value: Optional[Shift]):
-    self.__shift = value
-    if self.research_group and self.research_group.shift != value:
+    if self.__shift is value:
+      return
+    self.__shift     = value
+    self.__available = None
+    if self.research_group:
       self.research_group.shift = value
       
   @property
   def available_sessions(self):
-    sessions = set[Session]()
-    if self.shift:
-      sessions.update(self.shift.sessions)
-      sessions.difference_update(self.sessions)
-    return sorted(sessions)
+    return self.__available_sessions()[0]
+  
+  @property
+  def available_session_set(self):
+    return self.__available_sessions()[1]
+  
+  @property
+  def available_session_mask(self):
+    return self.__available_sessions()[2]
+  
+  def __available_sessions(self):
+    if self.__available is None:
+      sessions = set[Session]()
+      if self.shift:
+        sessions.update(self.shift.sessions)
+        sessions.difference_update(self.sessions)
+      self.__available = sorted(sessions), sessions, sum(
+        session.bit for session in sessions)
+    return self.__available
+  
+  def add_taken(self, course: Course):
+    self.taken.add(course)
+    self.taken_mask |= course.bit
+    self.qualified_cache.clear()
+    
+  def take(self, course_type: CourseType, course: Course):
+    if course_type in self.takes:
+      self.takes_mask &= ~self.takes[course_type].bit
+    self.takes[course_type] = course
+    self.takes_mask |= course.bit
+    self.qualified_cache.clear()
+    
+  def drop(self, course_type: CourseType):
+    course = self.takes.pop(course_type)
+    self.takes_mask &= ~course.bit
+    self.qualified_cache.clear()
+    return course
+  
+  def add_session(self, session: Session):
+    self.sessions.add(session)
+    self.__available = None
+    
+  def remove_session(self, session: Session):
+    self.sessions.remove(session)
+    self.__available = None
+    
+  def clear_sessions(self):
+    self.sessions.clear()
+    self.__available = None
   
   @property
   def has_taken_level_two(self):
@@ -244,118 +408,222 @@ class Student:
     return False
   
 class Section:
+  __slots__ = (
+    'course',
+    'parallel_session',
+    'capacity',
+    'minimum',
+    'ideal',
+    'maximum',
+    'students',
+    'load',
+    'sort_key')
+  
   course          : Course
   parallel_session: ParallelSession
   capacity        : Capacity
+  minimum         : int
+  ideal           : int
+  maximum         : int
   students        : set[Student]
+  load            : int
+  sort_key        : str
   
   def __init__(self, course: Course, parallel_session: ParallelSession):
     self.course           = course
     self.parallel_session = parallel_session
     self.capacity         = self.course.capacity_section
+    self.minimum          = self.capacity.minimum
+    self.ideal            = self.capacity.ideal
+    self.maximum          = self.capacity.maximum
     self.students         = set()
+    self.load             = 0
+    self.sort_key         = f'{course} {parallel_session}'
     
   def __repr__(self):
-    return '{} {}'.format(self.course, self.parallel_session)
+    return self.sort_key
   
   def __lt__(self, other: Section):
-    return str(self) < str(other)
+    return self.sort_key < other.sort_key
   
+  def fits(self, student: Student):
+    parallel_session = self.parallel_session
+    shift            = student.shift
+    if shift is None:
+      return True
+    return shift is parallel_session.shift and (
+      not parallel_session.session
+      or parallel_session.session in student.available_session_set)
+    
   def qualified(self, student: Student):
-    return all([
-      self.course.qualified(student),
-      student.shift in {self.parallel_session.shift, None},
-      self.parallel_session.session in student.available_sessions
-      if self.parallel_session.session and student.shift else True])
+    return self.fits(student) and self.course.qualified(student)
     
   def add(self, student: Student, course_type: CourseType):
     if self.qualified(student):
+      parallel_session = self.parallel_session
       self.students.add(student)
-      student.shift = self.parallel_session.shift
-      student.takes[course_type] = self.course
+      self.load = len(self.students)
+      student.shift = parallel_session.shift
+      student.take(course_type, self.course)
       student.sections[self.course] = self
-      if self.parallel_session.session:
-        student.sessions.add(self.parallel_session.session)
+      if parallel_session.session:
+        student.add_session(parallel_session.session)
       return True
     return False
   
+  def remove(self, student: Student):
+    self.students.remove(student)
+    self.load = len(self.students)
+    
+  def clear(self):
+    self.students.clear()
+    self.load = 0
+    
   def overload(self, student: Student, course_type: CourseType):
-    if len(self.students) < self.capacity.maximum:
+    if self.load < self.maximum:
       return self.add(student, course_type)
     return False
   
   def enroll(self, student: Student, course_type: CourseType):
-    if len(self.students) < self.capacity.ideal:
+    if self.load < self.ideal:
       return self.add(student, course_type)
     return False
   
 class Course:
+  __slots__ = (
+    'alias',
+    'difficulty_level',
+    'linked_to',
+    'sort_key',
+    'bit',
+    'capacity_section',
+    'capacity_sections',
+    'sections',
+    'sections_by',
+    'not_alongside',
+    'not_alongside_mask',
+    'prerequisites',
+    'prerequisite_masks')
+  
   alias           : str
   difficulty_level: int
   linked_to       : Optional[Course]
+  sort_key        : str
+  bit             : int
   
   capacity_section : Capacity
   capacity_sections: Capacity
   sections         : list[Section]
+  sections_by      : dict[Union[Session, Shift], list[Section]]
   
-  not_alongside: set[Course]
-  prerequisites: list[set[Course]]
+  not_alongside     : frozenset[Course]
+  not_alongside_mask: int
+  prerequisites     : list[frozenset[Course]]
+  prerequisite_masks: list[int]
+  
+  __count = 0
   
   def __init__(self, alias: str, difficulty_level: int):
     self.alias            = alias
     self.difficulty_level = difficulty_level
     self.linked_to        = None
+    self.sort_key         = '{}{}'.format(
+      alias, f' Level {difficulty_level}' if difficulty_level else '')
+    self.bit              = 1 << Course.__count
+    Course.__count += 1
     
-    self.sections      = list()
-    self.not_alongside = {self}
-    self.prerequisites = list()
+    self.sections           = list()
+    self.sections_by        = defaultdict(list)
+    self.not_alongside      = frozenset({self})
+    self.not_alongside_mask = self.bit
+    self.prerequisites      = list()
+    self.prerequisite_masks = list()
     
   def __repr__(self):
-    return '{}{}'.format(
-      self.alias,
-      f' Level {self.difficulty_level}' if self.difficulty_level else '')
+    return self.sort_key
     
   def __lt__(self, other: Course):
-    return str(self) < str(other)
+    return self.sort_key < other.sort_key
   
   @property
   def could_open_section(self):
-    return sum(
-      len(course.sections) for course in [self, self.linked_to] if course
-    ) < self.capacity_sections.maximum
+    count = len(self.sections)
+    if self.linked_to:
+      count += len(self.linked_to.sections)
+    return count < self.capacity_sections.maximum
+    
+  def add_section(self, section: Section):
+    self.sections.append(section)
+    self.sections_by[section.parallel_session.shift].append(section)
+    if section.parallel_session.session:
+      self.sections_by[section.parallel_session.session].append(section)
+      
+  def remove_sections(self, sections: set[Section]):
+    remaining = list(
+      section for section in self.sections if section not in sections)
+    self.clear_sections()
+    for section in remaining:
+      self.add_section(section)
+      
+  def clear_sections(self):
+    self.sections.clear()
+    self.sections_by.clear()
+    
+  def add_not_alongside(self, course: Course):
+    self.not_alongside = self.not_alongside.union({course})
+    self.not_alongside_mask |= course.bit
+    
+  def add_prerequisites(self, courses: Iterable[Course]):
+    prerequisites = frozenset(courses)
+    self.prerequisites.append(prerequisites)
+    self.prerequisite_masks.append(sum(
+      course.bit for course in prerequisites))
+    
+  def count_sections_by(self, value: Union[Session, Shift]):
+    if value in self.sections_by:
+      return len(self.sections_by[value])
+    return 0
     
   def list_sections_by(self, value: Union[Session, Shift]):
-    result = list[Section]()
-    for section in self.sections:
-      if value in section.parallel_session:
-        result.append(section)
-    return sorted(result, key=lambda section: len(section.students))
+    if value not in self.sections_by:
+      return list[Section]()
+    return sorted(self.sections_by[value], key=LOAD)
   
   def qualified(self, student: Student):
-    return all([
-      self not in student.taken,
-      self.not_alongside.isdisjoint(student.takes),
-      all(
-        prerequisites.intersection(student.taken)
-        for prerequisites in self.prerequisites)])
+    cache = student.qualified_cache
+    if self not in cache:
+      cache[self] = (
+        not self.bit & student.taken_mask
+        and not self.not_alongside_mask & student.takes_mask
+        and all(
+          prerequisites & student.taken_mask
+          for prerequisites in self.prerequisite_masks))
+    return cache[self]
+    
+  def sections_for(self, student: Student):
+    if student.shift is None:
+      return self.sections
+    return self.sections_by.get(student.shift, list[Section]())
     
   def overload(self, student: Student, course_type: CourseType):
-    try:
-      return min(filter(
-        lambda section: section.qualified(student),
-        self.sections), key=lambda section: len(section.students)
-      ).overload(student, course_type)
-    except ValueError:
+    if not self.qualified(student):
+      return False
+    section = min(filter(
+      lambda section: section.fits(student),
+      self.sections_for(student)), key=LOAD, default=None)
+    if section is None:
       return False
+    return section.overload(student, course_type)
     
   def enroll(self, student: Student, course_type: CourseType):
-    try:
-      return min(filter(
-        lambda section: section.qualified(student),
-        self.sections), key=lambda section: len(section.students)
-      ).enroll(student, course_type)
-    except ValueError:
+    if not self.qualified(student):
       return False
+    section = min(filter(
+      lambda section: section.fits(student),
+      self.sections_for(student)), key=LOAD, default=None)
+    if section is None:
+      return False
+    return section.enroll(student, course_type)
   
 class Data:
   def __init__(self):
@@ -365,6 +633,11 @@ class Data:
     self.grade_levels    = dict[str, GradeLevel]()
     self.research_groups = dict[str, ResearchGroup]()
     self.students        = defaultdict[GradeLevel, list[Student]](list)
+    
+    self.version        = 0
+    self.scores         = dict[CourseType, float]()
+    self.scores_total   = 0.0
+    self.scores_version = -1
 
   def reset(self):
     for students in self.students.values():
@@ -372,18 +645,78 @@ class Data:
         for course_type in self.course_types.values():
           course = None
           if course_type in student.takes:
-            course = student.takes.pop(course_type)
+            course = student.drop(course_type)
           if course in student.sections:
             student.sections.pop(course)
-        student.sessions.clear()
+        student.clear_sessions()
         student.rankings.reset()
         student.shift = None
     for course in self.courses.values():
-      course.sections.clear()
+      course.clear_sections()
+      
+  def snapshot(self):
+    return Snapshot(self)
+  
+  def restore(self, snapshot: Snapshot):
+    for student, state in snapshot.students.items():
+      takes, sections, sessions, shift, ordered_courses, reason_rejected = state
+      student.takes         = dict(takes)
+      student.takes_mask    = sum(course.bit for course in takes.values())
+      student.qualified_cache.clear()
+      student.sections      = dict(sections)
+      student.clear_sessions()
+      student.sessions.update(sessions)
+      student.shift         = shift
+      student.rankings.final.ordered_courses = dict(
+        (course_type, list(courses))
+        for course_type, courses in ordered_courses.items())
+      student.rankings.final.reason_rejected = dict(
+        (course_type, dict(reasons))
+        for course_type, reasons in reason_rejected.items())
+    for course, sections in snapshot.sections.items():
+      course.clear_sections()
+      for section, students in sections:
+        section.students = set(students)
+        section.load     = len(students)
+        course.add_section(section)
+    self.version = snapshot.version
+    
+class Snapshot:
+  version : int
+  students: dict[Student, tuple[
+    dict[CourseType, Course],
+    dict[Course, Section],
+    set[Session],
+    Optional[Shift],
+    dict[CourseType, list[Course]],
+    dict[CourseType, dict[Course, str]]]]
+  sections: dict[Course, list[tuple[Section, set[Student]]]]
+  
+  def __init__(self, data: Data):
+    self.version  = data.version
+    self.students = dict()
+    self.sections = dict()
+    for students in data.students.values():
+      for student in students:
+        final = student.rankings.final
+        self.students[student] = (
+          dict(student.takes),
+          dict(student.sections),
+          set(student.sessions),
+          student.shift,
+          dict(
+            (course_type, list(courses))
+            for course_type, courses in final.ordered_courses.items()),
+          dict(
+            (course_type, dict(reasons))
+            for course_type, reasons in final.reason_rejected.items()))
+    for course in data.courses.values():
+      self.sections[course] = list(
+        (section, set(section.students)) for section in course.sections)
 
 class SolutionV1:
-  shifts      : list[Shift]
-  courses     : list[Course]
+  shifts      : tuple[Shift, ...]
+  courses     : tuple[Course, ...]
   course_types: dict[str, CourseType]
   
   __research_groups : list[ResearchGroup]
@@ -391,35 +724,38 @@ class SolutionV1:
   __grouped_students: list[Student]
   __nogroup_students: list[Student]
   
-  core: CourseType
-  elec: CourseType
-  math: CourseType
-  res : CourseType
+  core     : CourseType
+  elec     : CourseType
+  math     : CourseType
+  res      : CourseType
+  electives: tuple[CourseType, CourseType]
   
   def __init__(self, data: Data):
     self.course_types = data.course_types
-    self.shifts       = sorted(data.shifts)
-    self.courses      = sorted(data.courses.values())
+    self.shifts       = tuple(sorted(data.shifts))
+    self.courses      = tuple(sorted(data.courses.values()))
     
     self.core = self.course_types[CORE]
     self.elec = self.course_types[ELEC]
     self.math = self.course_types[MATH]
     self.res  = self.course_types[RESEARCH]
     
+    self.electives = (self.core, self.elec)
+    
     self.__research_groups  = list()
     self.__students         = list()
     self.__grouped_students = list()
     self.__nogroup_students = list()
     for student in data.students[data.grade_levels['Grade 12']]:
+      rankings = student.rankings
       if not student.has_taken_level_two:
-        core = student.rankings.initial(self.core)
+        core = rankings.initial(self.core)
         if not core or core.difficulty_level != 2:
-          while student.rankings.current(self.elec).difficulty_level != 2:
-            student.rankings.final.pop(
-              self.elec, 'Needs to take a level 2 course', 0)
+          while rankings.current(self.elec).difficulty_level != 2:
+            rankings.final.pop(self.elec, 'Needs to take a level 2 course', 0)
         if not student.research_group:
-          research = random.choice(list(
-            student.grade_level.courses[(self.res, False)]))
+          research = random.choice(
+            student.grade_level.course_lists[(self.res, False)])
           student.research_group = ResearchGroup(research, 'Temporary')
           student.research_group.add(student)
           
@@ -441,111 +777,113 @@ class SolutionV1:
     
   @property
   def students(self):
-    random.shuffle(self.__students)
-    return self.__students
+    return random.sample(self.__students, len(self.__students))
   
   @property
   def research_groups(self):
-    random.shuffle(self.__research_groups)
-    return self.__research_groups
+    return random.sample(self.__research_groups, len(self.__research_groups))
   
   @property
   def grouped_students(self):
-    random.shuffle(self.__grouped_students)
-    return self.__grouped_students
+    return random.sample(self.__grouped_students, len(self.__grouped_students))
   
   @property
   def nogroup_students(self):
-    random.shuffle(self.__nogroup_students)
-    return self.__nogroup_students
+    return random.sample(self.__nogroup_students, len(self.__nogroup_students))
   
   def open_sections_to_overload(self, course_type: CourseType):
-    courses = set[Course](
-      student.rankings.current(course_type) for student in self.students)
+    courses = {
+      student.rankings.current(course_type) for student in self.__students}
     for course in courses:
       for shift in self.shifts:
-        course.sections.append(Section(course, ParallelSession(shift)))
+        course.add_section(Section(course, ParallelSession(shift)))
         
   def open_sections_spread_out(self, course_type: CourseType):
-    courses = set[Course](random.choice(list(student.grade_level.courses[(
-      course_type, False)])) for student in self.students)
+    courses = {
+      random.choice(student.grade_level.course_lists[(course_type, False)])
+      for student in self.__students}
     for course in courses:
       for shift in self.shifts:
         for session in shift.sessions:
-          course.sections.append(Section(course, ParallelSession(
+          course.add_section(Section(course, ParallelSession(
             shift, session)))
       leftover = course.capacity_sections.maximum - len(course.sections)
       for _ in range(leftover):
         shift   = random.choice(self.shifts)
         session = random.choice(shift.sessions)
-        course.sections.append(Section(course, ParallelSession(
-          shift, session, len(course.list_sections_by(session)))))
+        course.add_section(Section(course, ParallelSession(
+          shift, session, course.count_sections_by(session))))
         
   def get_course_demand(self, students: Iterable[Student]):
-    demand = defaultdict[Course, int](int)
+    courses = list[Course]()
     for student in students:
-      core = student.rankings.current(self.core)
-      elec = student.rankings.current(self.elec)
+      rankings = student.rankings
+      core = rankings.current(self.core)
+      elec = rankings.current(self.elec)
       while elec in core.not_alongside:
-        student.rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
-        elec = student.rankings.current(self.elec)
-      demand[core] += 1
-      demand[elec] += 1
-    return demand
+        rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
+        elec = rankings.current(self.elec)
+      courses.append(core)
+      courses.append(elec)
+    return Counter[Course](courses)
       
   def get_section_combinations(
     self, students: Iterable[Student], demand: dict[Course, int]):
-    section_combinations = defaultdict[Shift, set[tuple[
-      Student, Section, Section]]](set)
-    for student in students:
-      core = student.rankings.current(self.core)
-      elec = student.rankings.current(self.elec)
-      for csection in filter(
-        lambda s: len(s.students) + demand[core] <= s.capacity.maximum,
-        core.sections):
-        for esection in filter(
-          lambda s: len(s.students) + demand[core] <= s.capacity.maximum,
-          elec.sections):
-          if all([
-            csection.parallel_session.shift 
-            == esection.parallel_session.shift,
-            csection.parallel_session.session 
-            != esection.parallel_session.session]):
-            section_combinations[csection.parallel_session.shift].add((
-              student, csection, esection))
+    open_sections = dict[tuple[Course, int], dict[Shift, list[Section]]]()
+    def sections_by_shift(course: Course, incoming: int):
+      if (course, incoming) not in open_sections:
+        open_sections[(course, incoming)] = dict(
+          (shift, list(filter(
+            lambda s: s.load + incoming <= s.maximum,
+            course.sections_by.get(shift, list[Section]()))))
+          for shift in self.shifts)
+      return open_sections[(course, incoming)]
     
     paired_combinations = defaultdict[tuple[Shift, Session], list[tuple[
       Student, Section, Section]]](list)
-    for shift in section_combinations:
-      for session in shift.sessions:
-        for student, csection, esection in section_combinations[shift]:
-          if all([
-            csection.parallel_session.session != session,
-            esection.parallel_session.session != session]):
-            paired_combinations[(shift, session)].append((
-              student, csection, esection))
+    for student in students:
+      core = student.rankings.current(self.core)
+      elec = student.rankings.current(self.elec)
+      csections = sections_by_shift(core, demand[core])
+      esections = sections_by_shift(elec, demand[elec])
+      for shift in self.shifts:
+        sessions = shift.sessions
+        for csection in csections[shift]:
+          cbit = csection.parallel_session.bit
+          for esection in esections[shift]:
+            if not cbit & esection.parallel_session.bit:
+              bits = cbit | esection.parallel_session.bit
+              for session in sessions:
+                if not session.bit & bits:
+                  paired_combinations[(shift, session)].append((
+                    student, csection, esection))
     return paired_combinations
   
   def section_student(self, student: Student, course_type: CourseType):
-    course = student.rankings.current(course_type)
-    if course.qualified(student):
-      for session in student.available_sessions:
-        for section in course.list_sections_by(session):
-          if section.overload(student, course_type):
-            return
-      if course.could_open_section:
-        assert student.shift
-        session = random.choice(student.available_sessions)
-        section = Section(course, ParallelSession(
-          student.shift, session, len(course.list_sections_by(session))))
-        course.sections.append(section)
-        if not section.overload(student, course_type):
-          raise Exception('Impossible')
-        return
-      student.rankings.final.pop(course_type, 'No rooms available', 0)
-    else:
-      student.rankings.final.pop(course_type, 'No qualified', 0)
-    self.section_student(student, course_type)
+    rankings  = student.rankings
+    countdown = rankings.final.len(course_type) + len(
+      student.grade_level.courses[(course_type, True)])
+    while countdown:
+      countdown -= 1
+      course     = rankings.current(course_type)
+      if course.qualified(student):
+        for session in student.available_sessions:
+          for section in course.list_sections_by(session):
+            if section.overload(student, course_type):
+              return
+        if course.could_open_section:
+          assert student.shift
+          session = random.choice(student.available_sessions)
+          section = Section(course, ParallelSession(
+            student.shift, session, course.count_sections_by(session)))
+          course.add_section(section)
+          if not section.overload(student, course_type):
+            raise SolverFailure('Impossible')
+          return
+        rankings.final.pop(course_type, 'No rooms available', 0)
+      else:
+        rankings.final.pop(course_type, 'No qualified', 0)
+    raise SolverFailure('Impossible')
   
   def section_grouped(
     self, 
@@ -553,10 +891,10 @@ class SolutionV1:
     students       : set[Student], 
     combinations   : dict[tuple[Shift, Session], list[tuple[
       Student, Section, Section]]]):
+    research_full = not any(
+      s.load < s.ideal for s in research_course.sections)
     research_sections = list(filter(
-      lambda s: len(s.students) + len(students) <= s.capacity.ideal if any(
-                len(g.students) < g.capacity.ideal
-                for g in research_course.sections) else True,
+      lambda s: research_full or s.load + len(students) <= s.ideal,
       research_course.sections))
     if combinations:
       for rsection in research_sections:
@@ -569,96 +907,111 @@ class SolutionV1:
           student.rankings.current(self.math).overload(student, self.math)
 
         assert session
-        random.shuffle(combinations[(shift, session)])
+        options = defaultdict[Student, list[tuple[Section, Section]]](list)
         for student, csection, esection in combinations[(shift, session)]:
-          if not set(student.takes).isdisjoint([self.core, self.elec]):
-            csection.overload(student, self.core)
-            esection.overload(student, self.elec)
+          options[student].append((csection, esection))
+        pending = random.sample(list(options), len(options))
+        pending.sort(key=lambda student: len(options[student]))
+        for student in pending:
+          for csection, esection in sorted(
+            options[student], key=lambda pair: pair[0].load + pair[1].load):
+            if (
+              csection.load < csection.maximum
+              and esection.load < esection.maximum
+              and csection.qualified(student)
+              and esection.qualified(student)):
+              csection.overload(student, self.core)
+              esection.overload(student, self.elec)
+              break
         for student in students:
-          for type in {self.core, self.elec}.difference(student.takes):
-            self.section_student(student, type)
+          for type in self.electives:
+            if type not in student.takes:
+              self.section_student(student, type)
         return
     
     rsection = random.choice(research_sections)
     for student in students:
       rsection.overload(student, self.res)
       student.rankings.current(self.math).overload(student, self.math)
-      for course_type in [self.core, self.elec]:
+      for course_type in self.electives:
         self.section_student(student, course_type)
         
   def enroll_initial(self, student: Student):
-    research = random.choice(list(student.grade_level.courses[(
-      self.res, False)]))
-    core = student.rankings.current(self.core)
-    elec = student.rankings.current(self.elec)
+    rankings = student.rankings
+    research = random.choice(student.grade_level.course_lists[(
+      self.res, False)])
+    core = rankings.current(self.core)
+    elec = rankings.current(self.elec)
     while elec in core.not_alongside:
-      student.rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
-      elec = student.rankings.current(self.elec)
+      rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
+      elec = rankings.current(self.elec)
+    research_full = not any(
+      s.load < s.ideal for s in research.sections)
     for shift in self.shifts:
-      for c in core.list_sections_by(shift):
-        for e in elec.list_sections_by(shift):
-          for r in research.list_sections_by(shift):
-            if all([
-              c.parallel_session.session != e.parallel_session.session,
-              c.parallel_session.session != r.parallel_session.session,
-              e.parallel_session.session != r.parallel_session.session,
-              len(c.students) < c.capacity.maximum,
-              len(e.students) < e.capacity.maximum,
-              len(r.students) < r.capacity.ideal
-              if any(
-                len(s.students) < s.capacity.ideal
-                for s in research.sections) else True]):
-              if not all([
-                c.overload(student, self.core),
-                e.overload(student, self.elec),
-                r.overload(student, self.res)]):
-                raise Exception('Impossible')
-              student.rankings.current(self.math).overload(
-                student, self.math)
+      csections = first_per_session(filter(
+        lambda s: s.load < s.maximum,
+        core.list_sections_by(shift)))
+      esections = first_per_session(filter(
+        lambda s: s.load < s.maximum,
+        elec.list_sections_by(shift)))
+      rsections = first_per_session(filter(
+        lambda s: research_full or s.load < s.ideal,
+        research.list_sections_by(shift)))
+      for c in csections:
+        for e in esections:
+          if c.parallel_session.bit & e.parallel_session.bit:
+            continue
+          bits = c.parallel_session.bit | e.parallel_session.bit
+          for r in rsections:
+            if not bits & r.parallel_session.bit:
+              if not (
+                c.overload(student, self.core)
+                and e.overload(student, self.elec)
+                and r.overload(student, self.res)):
+                raise SolverFailure('Impossible')
+              rankings.current(self.math).overload(student, self.math)
               return True
     return False
   
   def cleanup_student_rankings(self, student: Student):
+    rankings = student.rankings
     if self.elec not in student.takes:
       core = None
       if self.core in student.takes:
         core = student.takes[self.core]
       else:
-        core = student.rankings.current(self.core)
+        core = rankings.current(self.core)
         
-      elec = student.rankings.current(self.elec)
+      elec = rankings.current(self.elec)
       while elec in core.not_alongside:
-        student.rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
-        elec = student.rankings.current(self.elec)
+        rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
+        elec = rankings.current(self.elec)
     if self.core not in student.takes:
       if self.elec in student.takes:
-        elec      = student.takes[self.elec]
-        core      = student.rankings.current(self.core)
-        countdown = len(student.grade_level.courses[(self.core, True)]) + 1
-        while core in elec.not_alongside and countdown:
-          student.rankings.final.pop(
-            self.core, 'Not compatible with STE', 0)
-          core       = student.rankings.current(self.core)
-          countdown -= 1
-        if not countdown:
-          raise Exception('Impossible')
+        elec = student.takes[self.elec]
+        for _ in range(2):
+          rankings.final.pop_leading(
+            self.core, 'Not compatible with STE', elec.not_alongside)
+          if rankings.current(self.core) not in elec.not_alongside:
+            break
+        else:
+          raise SolverFailure('Impossible')
   
   def open_sections_based_on(
     self, demand: defaultdict[Course, set[tuple[CourseType, Student]]]):
     good = False
     for course, pairs in demand.items():
-      sessioned = defaultdict[
-        tuple[Shift, Session], set[tuple[CourseType, Student]]](set)
-      for course_type, student in pairs:
-        assert student.shift
-        for session in student.available_sessions:
-          sessioned[(student.shift, session)].add((course_type, student))
-      shift, session = max(sessioned, key=lambda x: len(sessioned[x]))
-      if len(sessioned[(
-        shift, session)]) >= course.capacity_section.minimum:
+      sessioned = Counter[tuple[Shift, Session]]()
+      for _, student in pairs:
+        shift = student.shift
+        assert shift
+        sessioned.update(
+          (shift, session) for session in student.available_sessions)
+      (shift, session), count = sessioned.most_common(1)[0]
+      if count >= course.capacity_section.minimum:
         if course.could_open_section:
-          course.sections.append(Section(course, ParallelSession(
-            shift, session, len(course.list_sections_by(session)))))
+          course.add_section(Section(course, ParallelSession(
+            shift, session, course.count_sections_by(session))))
           for course_type, student in pairs:
             course.enroll(student, course_type)
           good = True
@@ -675,58 +1028,62 @@ class SolutionV1:
     return good
     
   def enroll_final(self, student: Student):
+    rankings = student.rankings
+    mask     = student.available_session_mask
     for core in filter(
       lambda course: course.qualified(student),
       student.grade_level.courses[(self.core, True)]):
+      csections = first_per_session(filter(
+        lambda s: s.load < s.maximum and s.parallel_session.bit & mask,
+        core.sections))
       for elec in filter(
-        lambda course: all([
-          course not in core.not_alongside,
-          course.qualified(student)]),
+        lambda course: (
+          course not in core.not_alongside
+          and course.qualified(student)),
         student.grade_level.courses[(self.elec, True)]):
-        for c in core.sections:
-          for e in elec.sections:
-            if all([
-              c.parallel_session.session in student.available_sessions,
-              e.parallel_session.session in student.available_sessions,
-              c.parallel_session.session != e.parallel_session.session,
-              len(c.students) < c.capacity.maximum,
-              len(e.students) < e.capacity.maximum]):
+        esections = first_per_session(filter(
+          lambda s: s.load < s.maximum and s.parallel_session.bit & mask,
+          elec.sections))
+        for c in csections:
+          for e in esections:
+            if not c.parallel_session.bit & e.parallel_session.bit:
               if not c.overload(student, self.core):
-                raise Exception('Impossible')
+                raise SolverFailure('Impossible')
               if not e.overload(student, self.elec):
-                raise Exception('Impossible')
-              if core != student.rankings.current(self.core):
-                student.rankings.final.pop(
-                  self.core, 'Last resort sectioning', 0)
-              if elec != student.rankings.current(self.elec):
-                student.rankings.final.pop(
-                  self.elec, 'Last resort sectioning', 0)
+                raise SolverFailure('Impossible')
+              if core != rankings.current(self.core):
+                rankings.final.pop(self.core, 'Last resort sectioning', 0)
+              if elec != rankings.current(self.elec):
+                rankings.final.pop(self.elec, 'Last resort sectioning', 0)
               return True
     return False
           
   def rebalance_sections(self):
-    for course in set[Course](
-      student.takes[self.course_types[course_type]]
-      for student in self.students for course_type in [CORE, ELEC]):
+    for course in {
+      student.takes[course_type]
+      for student in self.__students
+      for course_type in self.electives}:
       for shift in self.shifts:
         for session in shift.sessions:
           sections = course.list_sections_by(session)
-          students = set[Student]()
+          if not sections or sections[-1].load - sections[0].load <= 1:
+            continue
+          students = list[Student]()
           for section in sections:
-            for student in list(section.students):
-              section.students.remove(student)
-              for type, course_ in list(student.takes.items()):
+            for student in section.students:
+              for type, course_ in student.takes.items():
                 if course_ == course:
-                  student.sections.pop(student.takes.pop(type))
-                  student.sessions.remove(
+                  student.sections.pop(student.drop(type))
+                  student.remove_session(
                     section.parallel_session.session)  # type: ignore
                   break
-              students.add(student)
+              students.append(student)
+            section.clear()
           for student in students:
-            for type in [CORE, ELEC]:
-              if self.course_types[type] not in student.takes:
-                if not course.overload(student, self.course_types[type]):
-                  raise Exception('Impossible')
+            for type in self.electives:
+              if type not in student.takes:
+                if not course.overload(student, type):
+                  raise SolverFailure('Impossible')
                 break
           
   def run(self):
@@ -739,24 +1096,28 @@ class SolutionV1:
       self.section_grouped(research_group.course, students, combinations)
     for student in self.nogroup_students:
       if not self.enroll_initial(student):
-        random.choice(list(student.grade_level.courses[(
-          self.res, False)])).overload(student, self.res)
+        random.choice(student.grade_level.course_lists[(
+          self.res, False)]).overload(student, self.res)
         student.rankings.current(self.math).overload(student, self.math)
     for course in self.courses:
-      for section in list(course.sections):
-        if len(section.students) < section.capacity.minimum:
-          for student in list(section.students):
-            for type, course_ in list(student.takes.items()):
+      underloaded = set[Section]()
+      for section in course.sections:
+        if section.load < section.minimum:
+          for student in section.students:
+            for type, course_ in student.takes.items():
               if course == course_:
-                student.sections.pop(student.takes.pop(
-                  type)).students.remove(student)
-                student.sessions.remove(
+                student.sections.pop(student.drop(type))
+                student.remove_session(
                   section.parallel_session.session)  # type: ignore
-          course.sections.remove(section)
+                break
+          section.clear()
+          underloaded.add(section)
+      if underloaded:
+        course.remove_sections(underloaded)
     while True:
       demand = defaultdict[Course, set[tuple[CourseType, Student]]](set)
       for student in self.nogroup_students:
-        for course_type in [self.core, self.elec]:
+        for course_type in self.electives:
           if course_type not in student.takes:
             course = student.rankings.current(course_type)
             if not course.overload(student, course_type):
@@ -765,25 +1126,25 @@ class SolutionV1:
         break
     for student in self.students:
       if len(student.takes) != len(self.course_types):
-        for course_type in [self.core, self.elec]:
+        for course_type in self.electives:
           if course_type in student.takes:
-            section = student.sections.pop(student.takes.pop(course_type))
+            section = student.sections.pop(student.drop(course_type))
             
             assert section.parallel_session.session
-            student.sessions.remove(section.parallel_session.session)
-            section.students.remove(student)
+            student.remove_session(section.parallel_session.session)
+            section.remove(student)
         if not self.enroll_final(student):
-          raise Exception('Impossible')
+          raise SolverFailure('Impossible')
     self.rebalance_sections()
     if any(
-      len(s.students) < s.capacity.minimum
+      s.load < s.minimum
       for course in self.courses
       for s in course.sections if s.students):
-      raise Exception('Some sections are too underloaded')
+      raise SolverFailure('Some sections are too underloaded')
 
 class SolutionV2:
-  shifts      : list[Shift]
-  courses     : list[Course]
+  shifts      : tuple[Shift, ...]
+  courses     : tuple[Course, ...]
   course_types: dict[str, CourseType]
   
   __research_groups : list[ResearchGroup]
@@ -791,35 +1152,38 @@ class SolutionV2:
   __grouped_students: list[Student]
   __nogroup_students: list[Student]
   
-  core: CourseType
-  elec: CourseType
-  math: CourseType
-  res : CourseType
+  core     : CourseType
+  elec     : CourseType
+  math     : CourseType
+  res      : CourseType
+  electives: tuple[CourseType, CourseType]
   
   def __init__(self, data: Data):
     self.course_types = data.course_types
-    self.shifts       = sorted(data.shifts)
-    self.courses      = sorted(data.courses.values())
+    self.shifts       = tuple(sorted(data.shifts))
+    self.courses      = tuple(sorted(data.courses.values()))
     
     self.core = self.course_types[CORE]
     self.elec = self.course_types[ELEC]
     self.math = self.course_types[MATH]
     self.res  = self.course_types[RESEARCH]
     
+    self.electives = (self.core, self.elec)
+    
     self.__research_groups  = list()
     self.__students         = list()
     self.__grouped_students = list()
     self.__nogroup_students = list()
     for student in data.students[data.grade_levels['Grade 12']]:
+      rankings = student.rankings
       if not student.has_taken_level_two:
-        core = student.rankings.initial(self.core)
+        core = rankings.initial(self.core)
         if not core or core.difficulty_level != 2:
-          while student.rankings.current(self.elec).difficulty_level != 2:
-            student.rankings.final.pop(
-              self.elec, 'Needs to take a level 2 course', 0)
+          while rankings.current(self.elec).difficulty_level != 2:
+            rankings.final.pop(self.elec, 'Needs to take a level 2 course', 0)
         if not student.research_group:
-          research = random.choice(list(
-            student.grade_level.courses[(self.res, False)]))
+          research = random.choice(
+            student.grade_level.course_lists[(self.res, False)])
           student.research_group = ResearchGroup(research, 'Temporary')
           student.research_group.add(student)
           
@@ -841,111 +1205,113 @@ class SolutionV2:
     
   @property
   def students(self):
-    random.shuffle(self.__students)
-    return self.__students
+    return random.sample(self.__students, len(self.__students))
   
   @property
   def research_groups(self):
-    random.shuffle(self.__research_groups)
-    return self.__research_groups
+    return random.sample(self.__research_groups, len(self.__research_groups))
   
   @property
   def grouped_students(self):
-    random.shuffle(self.__grouped_students)
-    return self.__grouped_students
+    return random.sample(self.__grouped_students, len(self.__grouped_students))
   
   @property
   def nogroup_students(self):
-    random.shuffle(self.__nogroup_students)
-    return self.__nogroup_students
+    return random.sample(self.__nogroup_students, len(self.__nogroup_students))
   
   def open_sections_to_overload(self, course_type: CourseType):
-    courses = set[Course](
-      student.rankings.current(course_type) for student in self.students)
+    courses = {
+      student.rankings.current(course_type) for student in self.__students}
     for course in courses:
       for shift in self.shifts:
-        course.sections.append(Section(course, ParallelSession(shift)))
+        course.add_section(Section(course, ParallelSession(shift)))
         
   def open_sections_spread_out(self, course_type: CourseType):
-    courses = set[Course](random.choice(list(student.grade_level.courses[(
-      course_type, False)])) for student in self.students)
+    courses = {
+      random.choice(student.grade_level.course_lists[(course_type, False)])
+      for student in self.__students}
     for course in courses:
       for shift in self.shifts:
         for session in shift.sessions:
-          course.sections.append(Section(course, ParallelSession(
+          course.add_section(Section(course, ParallelSession(
             shift, session)))
       leftover = course.capacity_sections.maximum - len(course.sections)
       for _ in range(leftover):
         shift   = random.choice(self.shifts)
         session = random.choice(shift.sessions)
-        course.sections.append(Section(course, ParallelSession(
-          shift, session, len(course.list_sections_by(session)))))
+        course.add_section(Section(course, ParallelSession(
+          shift, session, course.count_sections_by(session))))
         
   def get_course_demand(self, students: Iterable[Student]):
-    demand = defaultdict[Course, int](int)
+    courses = list[Course]()
     for student in students:
-      core = student.rankings.current(self.core)
-      elec = student.rankings.current(self.elec)
+      rankings = student.rankings
+      core = rankings.current(self.core)
+      elec = rankings.current(self.elec)
       while elec in core.not_alongside:
-        student.rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
-        elec = student.rankings.current(self.elec)
-      demand[core] += 1
-      demand[elec] += 1
-    return demand
+        rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
+        elec = rankings.current(self.elec)
+      courses.append(core)
+      courses.append(elec)
+    return Counter[Course](courses)
       
   def get_section_combinations(
     self, students: Iterable[Student], demand: dict[Course, int]):
-    section_combinations = defaultdict[Shift, set[tuple[
-      Student, Section, Section]]](set)
-    for student in students:
-      core = student.rankings.current(self.core)
-      elec = student.rankings.current(self.elec)
-      for csection in filter(
-        lambda s: len(s.students) + demand[core] <= s.capacity.maximum,
-        core.sections):
-        for esection in filter(
-          lambda s: len(s.students) + demand[core] <= s.capacity.maximum,
-          elec.sections):
-          if all([
-            csection.parallel_session.shift 
-            == esection.parallel_session.shift,
-            csection.parallel_session.session 
-            != esection.parallel_session.session]):
-            section_combinations[csection.parallel_session.shift].add((
-              student, csection, esection))
+    open_sections = dict[tuple[Course, int], dict[Shift, list[Section]]]()
+    def sections_by_shift(course: Course, incoming: int):
+      if (course, incoming) not in open_sections:
+        open_sections[(course, incoming)] = dict(
+          (shift, list(filter(
+            lambda s: s.load + incoming <= s.maximum,
+            course.sections_by.get(shift, list[Section]()))))
+          for shift in self.shifts)
+      return open_sections[(course, incoming)]
     
     paired_combinations = defaultdict[tuple[Shift, Session], list[tuple[
       Student, Section, Section]]](list)
-    for shift in section_combinations:
-      for session in shift.sessions:
-        for student, csection, esection in section_combinations[shift]:
-          if all([
-            csection.parallel_session.session != session,
-            esection.parallel_session.session != session]):
-            paired_combinations[(shift, session)].append((
-              student, csection, esection))
+    for student in students:
+      core = student.rankings.current(self.core)
+      elec = student.rankings.current(self.elec)
+      csections = sections_by_shift(core, demand[core])
+      esections = sections_by_shift(elec, demand[elec])
+      for shift in self.shifts:
+        sessions = shift.sessions
+        for csection in csections[shift]:
+          cbit = csection.parallel_session.bit
+          for esection in esections[shift]:
+            if not cbit & esection.parallel_session.bit:
+              bits = cbit | esection.parallel_session.bit
+              for session in sessions:
+                if not session.bit & bits:
+                  paired_combinations[(shift, session)].append((
+                    student, csection, esection))
     return paired_combinations
   
   def section_student(self, student: Student, course_type: CourseType):
-    course = student.rankings.current(course_type)
-    if course.qualified(student):
-      for session in student.available_sessions:
-        for section in course.list_sections_by(session):
-          if section.overload(student, course_type):
-            return
-      if course.could_open_section:
-        assert student.shift
-        session = random.choice(student.available_sessions)
-        section = Section(course, ParallelSession(
-          student.shift, session, len(course.list_sections_by(session))))
-        course.sections.append(section)
-        if not section.overload(student, course_type):
-          raise Exception('Impossible')
-        return
-      student.rankings.final.pop(course_type, 'No rooms available', 0)
-    else:
-      student.rankings.final.pop(course_type, 'No qualified', 0)
-    self.section_student(student, course_type)
+    rankings  = student.rankings
+    countdown = rankings.final.len(course_type) + len(
+      student.grade_level.courses[(course_type, True)])
+    while countdown:
+      countdown -= 1
+      course     = rankings.current(course_type)
+      if course.qualified(student):
+        for session in student.available_sessions:
+          for section in course.list_sections_by(session):
+            if section.overload(student, course_type):
+              return
+        if course.could_open_section:
+          assert student.shift
+          session = random.choice(student.available_sessions)
+          section = Section(course, ParallelSession(
+            student.shift, session, course.count_sections_by(session)))
+          course.add_section(section)
+          if not section.overload(student, course_type):
+            raise SolverFailure('Impossible')
+          return
+        rankings.final.pop(course_type, 'No rooms available', 0)
+      else:
+        rankings.final.pop(course_type, 'No qualified', 0)
+    raise SolverFailure('Impossible')
   
   def section_grouped(
     self, 
@@ -953,10 +1319,10 @@ class SolutionV2:
     students       : set[Student], 
     combinations   : dict[tuple[Shift, Session], list[tuple[
       Student, Section, Section]]]):
+    research_full = not any(
+      s.load < s.ideal for s in research_course.sections)
     research_sections = list(filter(
-      lambda s: len(s.students) + len(students) <= s.capacity.ideal if any(
-                len(g.students) < g.capacity.ideal
-                for g in research_course.sections) else True,
+      lambda s: research_full or s.load + len(students) <= s.ideal,
       research_course.sections))
     if combinations:
       for rsection in research_sections:
@@ -969,96 +1335,111 @@ class SolutionV2:
           student.rankings.current(self.math).overload(student, self.math)
 
         assert session
-        random.shuffle(combinations[(shift, session)])
+        options = defaultdict[Student, list[tuple[Section, Section]]](list)
         for student, csection, esection in combinations[(shift, session)]:
-          if not set(student.takes).isdisjoint([self.core, self.elec]):
-            csection.overload(student, self.core)
-            esection.overload(student, self.elec)
+          options[student].append((csection, esection))
+        pending = random.sample(list(options), len(options))
+        pending.sort(key=lambda student: len(options[student]))
+        for student in pending:
+          for csection, esection in sorted(
+            options[student], key=lambda pair: pair[0].load + pair[1].load):
+            if (
+              csection.load < csection.maximum
+              and esection.load < esection.maximum
+              and csection.qualified(student)
+              and esection.qualified(student)):
+              csection.overload(student, self.core)
+              esection.overload(student, self.elec)
+              break
         for student in students:
-          for type in {self.core, self.elec}.difference(student.takes):
-            self.section_student(student, type)
+          for type in self.electives:
+            if type not in student.takes:
+              self.section_student(student, type)
         return
     
     rsection = random.choice(research_sections)
     for student in students:
       rsection.overload(student, self.res)
       student.rankings.current(self.math).overload(student, self.math)
-      for course_type in [self.core, self.elec]:
+      for course_type in self.electives:
         self.section_student(student, course_type)
         
   def enroll_initial(self, student: Student):
-    research = random.choice(list(student.grade_level.courses[(
-      self.res, False)]))
-    core = student.rankings.current(self.core)
-    elec = student.rankings.current(self.elec)
+    rankings = student.rankings
+    research = random.choice(student.grade_level.course_lists[(
+      self.res, False)])
+    core = rankings.current(self.core)
+    elec = rankings.current(self.elec)
     while elec in core.not_alongside:
-      student.rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
-      elec = student.rankings.current(self.elec)
+      rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
+      elec = rankings.current(self.elec)
+    research_full = not any(
+      s.load < s.ideal for s in research.sections)
     for shift in self.shifts:
-      for c in core.list_sections_by(shift):
-        for e in elec.list_sections_by(shift):
-          for r in research.list_sections_by(shift):
-            if all([
-              c.parallel_session.session != e.parallel_session.session,
-              c.parallel_session.session != r.parallel_session.session,
-              e.parallel_session.session != r.parallel_session.session,
-              len(c.students) < c.capacity.maximum,
-              len(e.students) < e.capacity.maximum,
-              len(r.students) < r.capacity.ideal
-              if any(
-                len(s.students) < s.capacity.ideal
-                for s in research.sections) else True]):
-              if not all([
-                c.overload(student, self.core),
-                e.overload(student, self.elec),
-                r.overload(student, self.res)]):
-                raise Exception('Impossible')
-              student.rankings.current(self.math).overload(
-                student, self.math)
+      csections = first_per_session(filter(
+        lambda s: s.load < s.maximum,
+        core.list_sections_by(shift)))
+      esections = first_per_session(filter(
+        lambda s: s.load < s.maximum,
+        elec.list_sections_by(shift)))
+      rsections = first_per_session(filter(
+        lambda s: research_full or s.load < s.ideal,
+        research.list_sections_by(shift)))
+      for c in csections:
+        for e in esections:
+          if c.parallel_session.bit & e.parallel_session.bit:
+            continue
+          bits = c.parallel_session.bit | e.parallel_session.bit
+          for r in rsections:
+            if not bits & r.parallel_session.bit:
+              if not (
+                c.overload(student, self.core)
+                and e.overload(student, self.elec)
+                and r.overload(student, self.res)):
+                raise SolverFailure('Impossible')
+              rankings.current(self.math).overload(student, self.math)
               return True
     return False
   
   def cleanup_student_rankings(self, student: Student):
+    rankings = student.rankings
     if self.elec not in student.takes:
       core = None
       if self.core in student.takes:
         core = student.takes[self.core]
       else:
-        core = student.rankings.current(self.core)
+        core = rankings.current(self.core)
         
-      elec = student.rankings.current(self.elec)
+      elec = rankings.current(self.elec)
       while elec in core.not_alongside:
-        student.rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
-        elec = student.rankings.current(self.elec)
+        rankings.final.pop(self.elec, 'Not compatible with CSE', 0)
+        elec = rankings.current(self.elec)
     if self.core not in student.takes:
       if self.elec in student.takes:
-        elec      = student.takes[self.elec]
-        core      = student.rankings.current(self.core)
-        countdown = len(student.grade_level.courses[(self.core, True)]) + 1
-        while core in elec.not_alongside and countdown:
-          student.rankings.final.pop(
-            self.core, 'Not compatible with STE', 0)
-          core       = student.rankings.current(self.core)
-          countdown -= 1
-        if not countdown:
-          raise Exception('Impossible')
+        elec = student.takes[self.elec]
+        for _ in range(2):
+          rankings.final.pop_leading(
+            self.core, 'Not compatible with STE', elec.not_alongside)
+          if rankings.current(self.core) not in elec.not_alongside:
+            break
+        else:
+          raise SolverFailure('Impossible')
   
   def open_sections_based_on(
     self, demand: defaultdict[Course, set[tuple[CourseType, Student]]]):
     good = False
     for course, pairs in demand.items():
-      sessioned = defaultdict[
-        tuple[Shift, Session], set[tuple[CourseType, Student]]](set)
-      for course_type, student in pairs:
-        assert student.shift
-        for session in student.available_sessions:
-          sessioned[(student.shift, session)].add((course_type, student))
-      shift, session = max(sessioned, key=lambda x: len(sessioned[x]))
-      if len(sessioned[(
-        shift, session)]) >= course.capacity_section.minimum:
+      sessioned = Counter[tuple[Shift, Session]]()
+      for _, student in pairs:
+        shift = student.shift
+        assert shift
+        sessioned.update(
+          (shift, session) for session in student.available_sessions)
+      (shift, session), count = sessioned.most_common(1)[0]
+      if count >= course.capacity_section.minimum:
         if course.could_open_section:
-          course.sections.append(Section(course, ParallelSession(
-            shift, session, len(course.list_sections_by(session)))))
+          course.add_section(Section(course, ParallelSession(
+            shift, session, course.count_sections_by(session))))
           for course_type, student in pairs:
             course.enroll(student, course_type)
           good = True
@@ -1075,58 +1456,62 @@ class SolutionV2:
     return good
     
   def enroll_final(self, student: Student):
+    rankings = student.rankings
+    mask     = student.available_session_mask
     for core in filter(
       lambda course: course.qualified(student),
       student.grade_level.courses[(self.core, True)]):
+      csections = first_per_session(filter(
+        lambda s: s.load < s.maximum and s.parallel_session.bit & mask,
+        core.sections))
       for elec in filter(
-        lambda course: all([
-          course not in core.not_alongside,
-          course.qualified(student)]),
+        lambda course: (
+          course not in core.not_alongside
+          and course.qualified(student)),
         student.grade_level.courses[(self.elec, True)]):
-        for c in core.sections:
-          for e in elec.sections:
-            if all([
-              c.parallel_session.session in student.available_sessions,
-              e.parallel_session.session in student.available_sessions,
-              c.parallel_session.session != e.parallel_session.session,
-              len(c.students) < c.capacity.maximum,
-              len(e.students) < e.capacity.maximum]):
+        esections = first_per_session(filter(
+          lambda s: s.load < s.maximum and s.parallel_session.bit & mask,
+          elec.sections))
+        for c in csections:
+          for e in esections:
+            if not c.parallel_session.bit & e.parallel_session.bit:
               if not c.overload(student, self.core):
-                raise Exception('Impossible')
+                raise SolverFailure('Impossible')
               if not e.overload(student, self.elec):
-                raise Exception('Impossible')
-              if core != student.rankings.current(self.core):
-                student.rankings.final.pop(
-                  self.core, 'Last resort sectioning', 0)
-              if elec != student.rankings.current(self.elec):
-                student.rankings.final.pop(
-                  self.elec, 'Last resort sectioning', 0)
+                raise SolverFailure('Impossible')
+              if core != rankings.current(self.core):
+                rankings.final.pop(self.core, 'Last resort sectioning', 0)
+              if elec != rankings.current(self.elec):
+                rankings.final.pop(self.elec, 'Last resort sectioning', 0)
               return True
     return False
           
   def rebalance_sections(self):
-    for course in set[Course](
-      student.takes[self.course_types[course_type]]
-      for student in self.students for course_type in [CORE, ELEC]):
+    for course in {
+      student.takes[course_type]
+      for student in self.__students
+      for course_type in self.electives}:
       for shift in self.shifts:
         for session in shift.sessions:
           sections = course.list_sections_by(session)
-          students = set[Student]()
+          if not sections or sections[-1].load - sections[0].load <= 1:
+            continue
+          students = list[Student]()
           for section in sections:
-            for student in list(section.students):
-              section.students.remove(student)
-              for type, course_ in list(student.takes.items()):
+            for student in section.students:
+              for type, course_ in student.takes.items():
                 if course_ == course:
-                  student.sections.pop(student.takes.pop(type))
-                  student.sessions.remove(
+                  student.sections.pop(student.drop(type))
+                  student.remove_session(
                     section.parallel_session.session)  # type: ignore
                   break
-              students.add(student)
+              students.append(student)
+            section.clear()
           for student in students:
-            for type in [CORE, ELEC]:
-              if self.course_types[type] not in student.takes:
-                if not course.overload(student, self.course_types[type]):
-                  raise Exception('Impossible')
+            for type in self.electives:
+              if type not in student.takes:
+                if not course.overload(student, type):
+                  raise SolverFailure('Impossible')
                 break
           
   def run(self):
@@ -1139,13 +1524,13 @@ class SolutionV2:
       self.section_grouped(research_group.course, students, combinations)
     for student in self.nogroup_students:
       if not self.enroll_initial(student):
-        random.choice(list(student.grade_level.courses[(
-          self.res, False)])).overload(student, self.res)
+        random.choice(student.grade_level.course_lists[(
+          self.res, False)]).overload(student, self.res)
         student.rankings.current(self.math).overload(student, self.math)
     while True:
       demand = defaultdict[Course, set[tuple[CourseType, Student]]](set)
       for student in self.nogroup_students:
-        for course_type in [self.core, self.elec]:
+        for course_type in self.electives:
           if course_type not in student.takes:
             course = student.rankings.current(course_type)
             if not course.overload(student, course_type):
@@ -1154,20 +1539,20 @@ class SolutionV2:
         break
     for student in self.students:
       if len(student.takes) != len(self.course_types):
-        for course_type in [self.core, self.elec]:
+        for course_type in self.electives:
           if course_type in student.takes:
-            section = student.sections.pop(student.takes.pop(course_type))
+            section = student.sections.pop(student.drop(course_type))
             
             assert section.parallel_session.session
-            student.sessions.remove(section.parallel_session.session)
-            section.students.remove(student)
+            student.remove_session(section.parallel_session.session)
+            section.remove(student)
         if not self.enroll_final(student):
-          raise Exception('Impossible')
+          raise SolverFailure('Impossible')
     self.rebalance_sections()
     
 class SolutionTemplate:
-  shifts      : list[Shift]
-  courses     : list[Course]
+  shifts      : tuple[Shift, ...]
+  courses     : tuple[Course, ...]
   course_types: dict[str, CourseType]
   
   __research_groups : list[ResearchGroup]
@@ -1182,8 +1567,8 @@ class SolutionTemplate:
   
   def __init__(self, data: Data):
     self.course_types = data.course_types
-    self.shifts       = sorted(data.shifts)
-    self.courses      = sorted(data.courses.values())
+    self.shifts       = tuple(sorted(data.shifts))
+    self.courses      = tuple(sorted(data.courses.values()))
     
     self.core = self.core
     self.elec = self.elec
@@ -1195,15 +1580,15 @@ class SolutionTemplate:
     self.__grouped_students = list()
     self.__nogroup_students = list()
     for student in data.students[data.grade_levels['Grade 12']]:
+      rankings = student.rankings
       if not student.has_taken_level_two:
-        core = student.rankings.initial(self.core)
+        core = rankings.initial(self.core)
         if not core or core.difficulty_level != 2:
-          while student.rankings.current(self.elec).difficulty_level != 2:
-            student.rankings.final.pop(
-              self.elec, 'Needs to take a level 2 course', 0)
+          while rankings.current(self.elec).difficulty_level != 2:
+            rankings.final.pop(self.elec, 'Needs to take a level 2 course', 0)
         if not student.research_group:
-          research = random.choice(list(
-            student.grade_level.courses[(self.res, False)]))
+          research = random.choice(
+            student.grade_level.course_lists[(self.res, False)])
           student.research_group = ResearchGroup(research, 'Temporary')
           student.research_group.add(student)
           
@@ -1225,23 +1610,19 @@ class SolutionTemplate:
     
   @property
   def students(self):
-    random.shuffle(self.__students)
-    return self.__students
+    return random.sample(self.__students, len(self.__students))
   
   @property
   def research_groups(self):
-    random.shuffle(self.__research_groups)
-    return self.__research_groups
+    return random.sample(self.__research_groups, len(self.__research_groups))
   
   @property
   def grouped_students(self):
-    random.shuffle(self.__grouped_students)
-    return self.__grouped_students
+    return random.sample(self.__grouped_students, len(self.__grouped_students))
   
   @property
   def nogroup_students(self):
-    random.shuffle(self.__nogroup_students)
-    return self.__nogroup_students
+    return random.sample(self.__nogroup_students, len(self.__nogroup_students))
           
   def run(self):
     ...
\ No newline at end of file
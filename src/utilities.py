@@ -1,122 +1,134 @@
 
     
-from __future__  import annotations
-from collections import defaultdict
-from openpyxl                      import load_workbook
-from openpyxl.utils                import get_column_letter
-from openpyxl.worksheet._read_only import ReadOnlyWorksheet
-from openpyxl.worksheet.worksheet  import Worksheet
-from os          import walk
-from os.path     import exists
-from src.classes import *
-from typing      import Any, Optional
-from xlsxwriter  import Workbook
+from __future__          import annotations
+from collections         import defaultdict
+from openpyxl            import load_workbook
+from openpyxl.chartsheet import Chartsheet
+from os                  import walk
+from os.path             import exists
+from src.classes         import (
+  Capacity,
+  Course,
+  CourseType,
+  Data,
+  GradeLevel,
+  ResearchGroup,
+  Session,
+  Shift,
+  SolutionV1,
+  SolverFailure,
+  Student)
+from time                import perf_counter_ns
+from typing              import Any, Iterable, Optional
+from xlsxwriter          import Workbook
+
+import json
 
 def as_text(value: Any):
   if value is None:
     return None
-  if any([
-    isinstance(value, float),
-    isinstance(value, int),
-    isinstance(value, str) and value.isdigit()]):
+  if (
+    isinstance(value, (float, int))
+    or isinstance(value, str) and value.isdigit()):
     return int(value)
   return str(value)
     
-def read_xlsx(path: str, sheet_name: str):
-  workbook = load_workbook(path)
-  worksheet = workbook[sheet_name]
-  data = list[list[Any]]()
-  if isinstance(worksheet, Worksheet):
-    for row in worksheet.rows:
-      data.append(list(as_text(cell.value) for cell in row))
+def read_xlsx(path: str):
+  workbook = load_workbook(path, read_only=True, data_only=True)
+  data = dict[str, list[tuple[Any, ...]]]()
+  for sheet_name in workbook.sheetnames:
+    worksheet = workbook[sheet_name]
+    data[sheet_name] = list[tuple[Any, ...]]()
+    if not isinstance(worksheet, Chartsheet):
+      for row in worksheet.iter_rows(values_only=True):
+        data[sheet_name].append(tuple(as_text(value) for value in row))
   workbook.close()
   return data
 
 def encode(data: Data, system_path: str, students_path: str):
-  sheet = read_xlsx(system_path, 'Shifts')
-  for r in range(1, len(sheet)):
+  system   = read_xlsx(system_path)
+  students = read_xlsx(students_path)
+  
+  for count, *sessions in system['Shifts'][1:]:
     shift = Shift()
-    for c in range(1, 1 + sheet[r][0]):
-      shift.add(Session(sheet[r][c]))
+    for session in sessions[:count]:
+      shift.add(Session(session))
     data.shifts.add(shift)
   
-  sheet = read_xlsx(system_path, 'Grade levels')
-  for r in range(len(sheet)):
-    grade_level = GradeLevel(sheet[r][0])
+  for alias, *_ in system['Grade levels']:
+    grade_level = GradeLevel(alias)
     data.grade_levels[str(grade_level)] = grade_level
     
-  sheet = read_xlsx(system_path, 'Course names')
-  for r in range(1, len(sheet)):
-    course = Course(sheet[r][0], sheet[r][1])
+  for alias, difficulty_level, *_ in system['Course names'][1:]:
+    course = Course(alias, difficulty_level)
     data.courses[str(course)] = course
     
-  sheet = read_xlsx(system_path, 'Course capacities')
-  for r in range(1, len(sheet)):
-    course = data.courses[sheet[r][0]]
-    course.capacity_section = Capacity(
-      sheet[r][1], sheet[r][2], sheet[r][3])
-    course.capacity_sections = Capacity(0, 0, sheet[r][4])
+  for alias, minimum, ideal, maximum, sections, *_ in system[
+    'Course capacities'][1:]:
+    course = data.courses[alias]
+    course.capacity_section  = Capacity(minimum, ideal, maximum)
+    course.capacity_sections = Capacity(0, 0, sections)
   
-  sheet = read_xlsx(system_path, 'Course links')
-  for r in range(1, len(sheet)):
-    data.courses[sheet[r][0]].linked_to = data.courses[sheet[r][1]]
+  for alias, linked_to, *_ in system['Course links'][1:]:
+    data.courses[alias].linked_to = data.courses[linked_to]
   
-  sheet = read_xlsx(system_path, 'Course classification')
-  for r in range(1, len(sheet)):
-    for c in range(1, len(sheet[r]), 3):
-      if any(cell == 'Y' for cell in sheet[r][c:c + 3]):
-        course_type = sheet[0][c + 2]
+  header, *rows = system['Course classification']
+  columns = list(
+    (c, header[c], header[c + 1] == 'Y', header[c + 2])
+    for c in range(1, len(header), 3))
+  for row in rows:
+    course = data.courses[row[0]]
+    for c, grade_level, ranked, course_type in columns:
+      if any(cell == 'Y' for cell in row[c:c + 3]):
         if course_type not in data.course_types:
           data.course_types[course_type] = CourseType(
             course_type, len(data.course_types))
-        data.grade_levels[sheet[0][c]].add(
-          data.course_types[course_type],
-          sheet[0][c + 1] == 'Y',
-          data.courses[sheet[r][0]])
+        data.grade_levels[grade_level].add(
+          data.course_types[course_type], ranked, course)
   
-  sheet = read_xlsx(system_path, 'Course prerequisites')
-  for r in range(1, len(sheet)):
-    for c in range(2, 2 + sheet[r][1]):
-      data.courses[sheet[r][0]].prerequisites.append(set(
-        data.courses[course] for course in sheet[r][c].split('||')))
+  for alias, count, *prerequisites in system['Course prerequisites'][1:]:
+    for prerequisite in prerequisites[:count]:
+      data.courses[alias].add_prerequisites(
+        data.courses[course] for course in prerequisite.split('||'))
   
-  sheet = read_xlsx(system_path, 'Course not alongside')
-  for r in range(1, len(sheet)):
-    for c in range(2, 2 + sheet[r][1]):
-      data.courses[sheet[r][0]].not_alongside.add(
-        data.courses[sheet[r][c]])
+  for alias, count, *not_alongside in system['Course not alongside'][1:]:
+    for course in not_alongside[:count]:
+      data.courses[alias].add_not_alongside(data.courses[course])
   
-  sheet = read_xlsx(students_path, 'Research groups')
-  for r in range(2, len(sheet)):
-    research_group = ResearchGroup(
-      data.courses[sheet[0][1]], sheet[r][0])
+  sheet = students['Research groups']
+  research_course = data.courses[sheet[0][1]]
+  for alias, *_ in sheet[2:]:
+    research_group = ResearchGroup(research_course, alias)
     data.research_groups[str(research_group)] = research_group
   
   for grade_level_alias in data.grade_levels:
-    sheet = read_xlsx(students_path, grade_level_alias)
-    for r in range(2, len(sheet)):
-      grade_level = data.grade_levels[sheet[r][0]]
-      student = Student(sheet[r][1], grade_level)
+    header, subheader, *rows = students[grade_level_alias]
+    for row in rows:
+      grade_level = data.grade_levels[row[0]]
+      student = Student(row[1], grade_level)
       
       c = 2
-      if sheet[0][c] == 'Groups':
-        research_course = data.courses[sheet[1][2]]
-        key = f'{research_course} {sheet[r][c]}'
+      if header[c] == 'Groups':
+        research_course = data.courses[subheader[2]]
+        key = f'{research_course} {row[c]}'
         if key in data.research_groups:
           data.research_groups[key].add(student)
           student.research_group = data.research_groups[key]
         c += 1
-      while sheet[0][c] == 'Previous year':
-        student.taken.add(data.courses[sheet[r][c]])
+      while header[c] == 'Previous year':
+        student.add_taken(data.courses[row[c]])
         c += 1
-      for d in range(c, len(sheet[r])):
-        if sheet[r][d]:
+      for d in range(c, len(row)):
+        if row[d]:
           student.rankings.add(
-            data.course_types[sheet[1][d]], 
-            data.courses[sheet[r][d]])
+            data.course_types[subheader[d]], 
+            data.courses[row[d]])
       data.students[grade_level].append(student)
     data.students[data.grade_levels[grade_level_alias]].sort()
     
+def seconds_since(initial_time: int):
+  return (perf_counter_ns() - initial_time + 999_999_999) // 1_000_000_000
+    
 def find_filepath(directory: str, template: str):
   path_template = f'{directory}/{template}'
   for index in range(len(next(walk(directory))[2]) + 1):
@@ -124,73 +136,88 @@ def find_filepath(directory: str, template: str):
       return path_template.format(index)
   return path_template.format(0)
 
-def generate_xlsx(path: str):
-  workbook = Workbook(path)
-  workbook.close()
-  
-def delete_default_sheet(path: str):
-  workbook = load_workbook(path)
-  if 'Sheet1' in workbook.sheetnames:
-    worksheet = workbook['Sheet1']
-    if not isinstance(worksheet, ReadOnlyWorksheet):
-      workbook.remove(worksheet)
-  workbook.save(path)
-  workbook.close()
-  
-def realign_columns(path: str, sheet: str):
-  workbook = load_workbook(path)
-  worksheet = workbook[sheet]
-  if isinstance(worksheet, Worksheet):
-    for column_cells in worksheet.columns:
-      worksheet.column_dimensions[
-        get_column_letter(column_cells[0].column)
-      ].width = max(len(repr(cell.value)) for cell in column_cells)
-  workbook.save(path)
-  workbook.close()
+def find_filepaths(directory: str, template: str, count: int):
+  path_template = f'{directory}/{template}'
+  index = 0
+  while count:
+    if not exists(path_template.format(index)):
+      yield path_template.format(index)
+      count -= 1
+    index += 1
 
-def to_xlsx(path: str, sheet: str, data: list[list]):
-  if not exists(path):
-    generate_xlsx(path)
-    
-  workbook = load_workbook(path)
-  worksheet = workbook.create_sheet(sheet)
-  for row in data:
-    worksheet.append(as_text(cell) for cell in row)
-  workbook.save(path)
-  workbook.close()
-  
-  delete_default_sheet(path)
-  realign_columns(path, sheet)
+def to_xlsx(workbook: Workbook, sheet: str, data: Iterable[Iterable]):
+  worksheet = workbook.add_worksheet(sheet)
+  widths = list[int]()
+  for r, row in enumerate(data):
+    values = list(as_text(cell) for cell in row)
+    worksheet.write_row(r, 0, values)
+    for c, value in enumerate(values):
+      if c < len(widths):
+        widths[c] = max(widths[c], len(repr(value)))
+      else:
+        widths.append(len(repr(value)))
+  for c, width in enumerate(widths):
+    worksheet.set_column(c, c, width)
+ 
+def to_record(sheets: Iterable[tuple[str, Iterable[Iterable]]]):
+  return dict(
+    (sheet, list(list(as_text(cell) for cell in row) for row in rows))
+    for sheet, rows in sheets)
+
+def to_jsonl(path: str, records: Iterable[dict[str, list[list]]]):
+  with open(path, 'a') as file:
+    for record in records:
+      file.write(json.dumps(record) + '\n')
+
+def jsonl_to_xlsx(path: str, directory: str, template: str):
+  with open(path) as file:
+    records = list(json.loads(line) for line in file if line.strip())
+  for filepath, record in zip(
+    find_filepaths(directory, template, len(records)), records):
+    workbook = Workbook(filepath, {'constant_memory': True})
+    for sheet, rows in record.items():
+      to_xlsx(workbook, sheet, rows)
+    workbook.close()
  
 def score(data: Data, show_results: Optional[bool] = None):
-  total  = defaultdict[CourseType, int](int)
-  actual = defaultdict[CourseType, int](int)
-  for students in data.students.values():
-    for student in students:
-      for course_type, ranked in student.grade_level.courses:
-        if ranked:
-          course = student.rankings.initial(course_type)
-          if course:
+  if data.scores_version != data.version:
+    total  = defaultdict[CourseType, int](int)
+    actual = defaultdict[CourseType, int](int)
+    for students in data.students.values():
+      for student in students:
+        takes           = student.takes
+        reason_rejected = student.rankings.final.reason_rejected
+        for course_type, courses in (
+          student.rankings.start.ordered_courses.items()):
+          if courses:
+            course = courses[0]
             total[course_type] += 1
-            if course_type in student.takes:
-              if course == student.takes[
-                course_type] or student.rankings.final.reason_rejected[
-                  course_type][course] == 'No rooms available':
+            if course_type in takes:
+              if course == takes[course_type] or reason_rejected[
+                course_type][course] == 'No rooms available':
                 actual[course_type] += 1
+    
+    data.scores = dict(
+      (course_type, actual[course_type] / total[course_type] * 100)
+      for course_type in total)
+    data.scores_total   = sum(data.scores.values())
+    data.scores_version = data.version
   
-  scores = dict(
-    (course_type, actual[course_type] / total[course_type] * 100)
-    for course_type in total)
+  scores = data.scores
   if show_results:
     for course_type in scores:
       print(f'{scores[course_type]}% [{course_type}]')
   return scores
     
+def total_score(data: Data, show_results: Optional[bool] = None):
+  score(data, show_results)
+  return data.scores_total
+
 def meets_target_scores(data: Data, target_score: dict[CourseType, float]):
   scores = score(data, True)
-  return not any(list(
-    scores[c2] < target_score[c1]
-    for c1, c2 in zip(sorted(target_score), sorted(scores))))
+  return not any(
+    course_type in scores and scores[course_type] < target
+    for course_type, target in target_score.items())
   
 def get_target_scores(data: Data):
   course_types = set[CourseType]()
@@ -201,8 +228,11 @@ def get_target_scores(data: Data):
     yield course_type, float(input(f'Target % [{course_type}]: '))
     
 def solve(data: Data):
-  try:
-    SolutionV1(data).run()
-  except:
+  while True:
+    data.version += 1
     data.reset()
-    return solve(data)
\ No newline at end of file
+    try:
+      SolutionV1(data).run()
+    except (SolverFailure, AssertionError, LookupError):
+      continue
+    return
\ No newline at end of file